@@ -2,23 +2,25 @@ from __future__ import annotations
 import os
 import sys
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from typing import Optional, LiteralString
-from database.db import (add_contact, delete_contacts, export_contacts_csv, import_contacts_csv,
-                         init_db, list_contacts, update_contact)
+from concurrent.futures import Future, ThreadPoolExecutor
+from tkinter import messagebox, ttk
+from typing import Callable, Optional, LiteralString
+from database.db import (add_contact, close_db, delete_contacts, export_contacts_csv, get_contact,
+                         import_contacts_csv, init_db, list_contacts, search_folds_case, update_contact)
 from ui.ui import ContactDialog, MainWindow
 from ui.ui_helpers import ask_yes_no
 
+# период опроса фоновых задач из главного потока Tk (мс)
+_POLL_MS = 30
 
-def _add_header_logo(parent: tk.Misc) -> None:
-    """Показывает логотип в верхней части окна."""
-    img_path = _resource_path("assets", "app.png")
-    if not os.path.exists(img_path):
+
+def _add_header_logo(parent: tk.Misc, logo_img: Optional[tk.PhotoImage]) -> None:
+    """Показывает логотип в верхней части окна (если он загружен)."""
+    if logo_img is None:
         return
-    parent.logo_img = tk.PhotoImage(file=img_path)
     header = ttk.Frame(parent)
     header.pack(fill="x", pady=(6, 2))
-    tk.Label(header, image=parent.logo_img).pack(side="left", padx=(6, 8))
+    tk.Label(header, image=logo_img).pack(side="left", padx=(6, 8))
     ttk.Label(header, text="hack_yourself.CRM", font=("Segoe UI", 14, "bold")).pack(side="left")
 
 def _resource_path(*parts: str) -> LiteralString | str | bytes:
@@ -26,14 +28,12 @@ def _resource_path(*parts: str) -> LiteralString | str | bytes:
     base = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__)))
     return os.path.join(base, *parts)
 
-def _set_app_icon(root: tk.Tk) -> None:
+def _set_app_icon(root: tk.Tk, logo_img: Optional[tk.PhotoImage]) -> None:
     """Ставит иконку для окна (.png/.ico). Без ошибок, даже если файл не найден."""
     try:
         # кроссплатформенно: .png через iconphoto
-        png_path = _resource_path("assets", "app.png")
-        if os.path.exists(png_path):
-            img = tk.PhotoImage(file=png_path)
-            root.iconphoto(True, img)
+        if logo_img is not None:
+            root.iconphoto(True, logo_img)
     except Exception:
         pass
 
@@ -55,33 +55,84 @@ def main() -> None:
     """
     init_db()
     root = tk.Tk()
-    _set_app_icon(root)
+    # app.png читается один раз и служит и иконкой окна, и логотипом в шапке;
+    # ссылка хранится на root, иначе Tk потеряет изображение при сборке мусора
+    logo_path = _resource_path("assets", "app.png")
+    root.logo_img = tk.PhotoImage(file=logo_path) if os.path.exists(logo_path) else None
+    _set_app_icon(root, root.logo_img)
     root.title('hack_yourself.CRM')
-    _add_header_logo(root)
+    _add_header_logo(root, root.logo_img)
     root.geometry('1000x560')
     style = ttk.Style()
     style.theme_use('clam')
+    # один рабочий поток: задачи к БД выполняются по очереди, не блокируя цикл Tk
+    pool = ThreadPoolExecutor(max_workers=1)
 
+    def run_in_background(fn: Callable, *args, on_done: Callable[[Future], None]) -> None:
+        """
+        Выполняет 'fn(*args)' в рабочем потоке и передаёт завершённый Future в 'on_done'.
+        Готовность проверяется через 'root.after', поэтому 'on_done' всегда
+        вызывается в главном потоке и может работать с виджетами.
+        """
+        future = pool.submit(fn, *args)
+        ui.begin_busy()
+
+        def poll() -> None:
+            if not future.done():
+                root.after(_POLL_MS, poll)
+                return
+            ui.end_busy()
+            on_done(future)
+        root.after(_POLL_MS, poll)
+
+    # незавершённая фоновая загрузка таблицы: (номер запроса, строка поиска) или None
+    pending_load: Optional[tuple[int, str]] = None
 
     def load(q: str='') -> None:
         """
-        Загружает контакты из БД и передаёт их в таблицу.
+        Загружает контакты из БД (в фоне) и передаёт их в таблицу.
 
         Параметры:
             q: Строка поиска (по умолчанию пусто — все записи)
         """
-        ui.set_rows(list_contacts(q))
+        nonlocal pending_load
+        token = ui.request_token()
+        pending_load = (token, q)
+
+        def done(future: Future) -> None:
+            nonlocal pending_load
+            if pending_load is not None and pending_load[0] == token:
+                pending_load = None
+            rows = future.result()
+            if ui.is_current(token):
+                ui.set_rows(rows, q)
+        run_in_background(list_contacts, q, on_done=done)
+
+    def reload_if_loading() -> bool:
+        """
+        Перезапускает незавершённую загрузку таблицы после изменения данных.
+        Её результат мог быть прочитан до изменения и затёр бы точечное обновление строк.
+
+        Возвращает:
+            'True', если загрузка перезапущена (точечное обновление не нужно).
+        """
+        if pending_load is None or not ui.is_current(pending_load[0]):
+            return False
+        ui.invalidate_cache()
+        load(pending_load[1])
+        return True
 
     def on_add() -> None:
         """Открывает диалог создания контакта и сохраняет его при подтверждении."""
         dlg = ContactDialog(root, 'Новый контакт')
         if dlg.result:
             try:
-                add_contact(dlg.result)
+                row = add_contact(dlg.result)
             except ValueError as e:
                 messagebox.showerror('Ошибка валидации', str(e))
                 return
-            load()
+            if not reload_if_loading():
+                ui.insert_row(row)
 
     def on_edit(contact_id: Optional[int]) -> None:
         """
@@ -109,7 +160,14 @@ def main() -> None:
             except ValueError as e:
                 messagebox.showerror('Ошибка валидации', str(e))
                 return
-            load()
+            if reload_if_loading():
+                return
+            row = get_contact(contact_id)
+            if row is None:
+                # запись уже удалена — убираем её из таблицы
+                ui.delete_rows([contact_id])
+            else:
+                ui.update_row(row)
 
     def on_del(ids: len) -> None:
         title = "Удаление"
@@ -119,7 +177,8 @@ def main() -> None:
             return
         if ask_yes_no(root, title, msg):
             delete_contacts(ids)
-            load()
+            if not reload_if_loading():
+                ui.delete_rows(ids)
 
     def on_search(q: str) -> None:
         """Применяет поиск по подстроке и обновляет таблицу."""
@@ -127,6 +186,7 @@ def main() -> None:
 
     def on_export() -> None:
         """Сохраняет все контакты в CSV-файл, выбранный пользователем."""
+        from tkinter import filedialog  # нужен только здесь — не грузим при старте
         path = filedialog.asksaveasfilename(
             defaultextension='.csv',
             filetypes=[('CSV', '*.csv')],
@@ -134,28 +194,38 @@ def main() -> None:
         )
         if not path:
             return
-        try:
-            n = export_contacts_csv(path)
-            messagebox.showinfo('Экспорт завершён', f'Экспортировано записей: {n}')
-        except Exception as e:
-            messagebox.showerror('Ошибка экспорта', str(e))
+
+        def done(future: Future) -> None:
+            try:
+                n = future.result()
+                messagebox.showinfo('Экспорт завершён', f'Экспортировано записей: {n}')
+            except Exception as e:
+                messagebox.showerror('Ошибка экспорта', str(e))
+        run_in_background(export_contacts_csv, path, on_done=done)
 
     def on_import() -> None:
         """Импортирует контакты из выбранного CSV-файла."""
+        from tkinter import filedialog  # нужен только здесь — не грузим при старте
         path = filedialog.askopenfilename(filetypes=[('CSV', '*.csv')], title='Импорт контактов из CSV')
         if not path:
             return
-        try:
-            n = import_contacts_csv(path)
-            load()
-            messagebox.showinfo('Импорт завершён', f'Импортировано записей: {n}')
-        except ValueError as e:
-            messagebox.showerror('Ошибка валидации', str(e))
-        except Exception as e:
-            messagebox.showerror('Ошибка импорта', str(e))
-    ui = MainWindow(root, on_add, on_edit, on_del, on_search, on_import, on_export)
+
+        def done(future: Future) -> None:
+            try:
+                n = future.result()
+                ui.invalidate_cache()
+                load()
+                messagebox.showinfo('Импорт завершён', f'Импортировано записей: {n}')
+            except ValueError as e:
+                messagebox.showerror('Ошибка валидации', str(e))
+            except Exception as e:
+                messagebox.showerror('Ошибка импорта', str(e))
+        run_in_background(import_contacts_csv, path, on_done=done)
+    ui = MainWindow(root, on_add, on_edit, on_del, on_search, on_import, on_export, search_folds_case)
     load()
     root.mainloop()
+    pool.shutdown(wait=False, cancel_futures=True)
+    close_db()
 
 if __name__ == '__main__':
     main()
@@ -1,51 +1,95 @@
 from __future__ import annotations
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
 import sqlite3
+import threading
 import csv
 import re
 
 
 DB_PATH = 'database\\crm.db'
 
+# единое долгоживущее соединение (создаётся в 'init_db' или при первом обращении)
+_CONN: Optional[sqlite3.Connection] = None
+# соединение разделяется между потоками, поэтому запросы выполняются под блокировкой
+_LOCK = threading.RLock()
+# отдельное соединение только для чтения списков и экспорта: в режиме WAL чтение
+# не мешает записи, поэтому долгий экспорт не задерживает изменения из интерфейса
+_READ_CONN: Optional[sqlite3.Connection] = None
+_READ_LOCK = threading.RLock()
+# сколько строк 'iter_contacts' выбирает из курсора за одно взятие блокировки
+_FETCH_BATCH = 500
+
+# неизменные тексты запросов — SQLite берёт готовый план из кэша выражений соединения
+# (выбираются только поля, которые показывает таблица, без 'created_at')
+_LIST_SQL_NO_FILTER = 'SELECT id, name, email, phone, company, tags, notes FROM contacts ORDER BY created_at DESC'
+_LIST_SQL_FILTER = ('SELECT id, name, email, phone, company, tags, notes FROM contacts'
+                    ' WHERE name LIKE ?1 OR email LIKE ?1 OR phone LIKE ?1 OR company LIKE ?1 OR tags LIKE ?1'
+                    ' ORDER BY created_at DESC')
+# поиск через полнотекстовый индекс (триграммы дают совпадение по любой подстроке)
+_LIST_SQL_FTS = ('SELECT id, name, email, phone, company, tags, notes FROM contacts'
+                 ' WHERE id IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH ?1)'
+                 ' ORDER BY created_at DESC')
+_GET_SQL = 'SELECT id, name, email, phone, company, tags, notes FROM contacts WHERE id=?'
+# триграммный индекс не находит строки короче трёх символов — для них остаётся LIKE
+_FTS_MIN_QUERY = 3
+# полнотекстовый индекс и триггеры, поддерживающие его в актуальном состоянии
+_FTS_SCHEMA_SQL = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    name, email, phone, company, tags,
+    content='contacts', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts(rowid, name, email, phone, company, tags)
+    VALUES (new.id, new.name, new.email, new.phone, new.company, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, name, email, phone, company, tags)
+    VALUES ('delete', old.id, old.name, old.email, old.phone, old.company, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, name, email, phone, company, tags)
+    VALUES ('delete', old.id, old.name, old.email, old.phone, old.company, old.tags);
+    INSERT INTO contacts_fts(rowid, name, email, phone, company, tags)
+    VALUES (new.id, new.name, new.email, new.phone, new.company, new.tags);
+END;
+'''
+_FTS_DROP_TRIGGERS_SQL = '''
+DROP TRIGGER IF EXISTS contacts_fts_ai;
+DROP TRIGGER IF EXISTS contacts_fts_ad;
+DROP TRIGGER IF EXISTS contacts_fts_au;
+'''
+# выставляется в 'init_db': False, если SQLite собран без FTS5 или без токенизатора 'trigram'
+_FTS_AVAILABLE = False
+# удаление по списку id: число плейсхолдеров округляется вверх до ближайшей "корзины"
+_DEL_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+_DEL_SQL = {n: f"DELETE FROM contacts WHERE id IN ({','.join('?' * n)})" for n in _DEL_BUCKETS}
+_DEL_PAD_ID = -1  # заведомо несуществующий id для дополнения списка
+
 NAME_ALLOWED = re.compile("^[A-Za-zА-Яа-яЁё\\-' ]+$")
 PHONE_ALLOWED = re.compile('^[0-9+()\\- ]+$')
+_PHONE_NORM = re.compile('[^\\d+]')
 
-def validate_name_or_raise(name: str) -> None:
+def validate_contact_or_raise(data: Mapping) -> None:
     """
-    Функция для проверки корректности введённого имени.
-    Допускаются только буквы (латиница/кириллица), пробел, дефис и апостроф.
-    Выбрасывает исключение class: 'ValueError', если имя некорректно.
+    Проверяет имя, email и телефон контакта за один проход.
+    Имя обязательно: только буквы (латиница/кириллица), пробел, дефис и апостроф.
+    Email (если указан) должен содержать '@' не первым и не последним символом.
+    Телефон (если указан) — только цифры, пробел, +, (), -.
+    Исключение ValueError при первой ошибке.
 
     Параметры:
-        name: Имя контакта (обязательное поле).
+        data: Данные контакта (ключи: 'name', 'email', 'phone').
     """
-    if not name or not NAME_ALLOWED.fullmatch(name.strip()):
+    name = (data.get('name') or '').strip()
+    if not name or not NAME_ALLOWED.fullmatch(name):
         raise ValueError('Ошибка. Имя должно содержать только буквы, пробелы, дефис или апостроф.')
-
-def validate_email_or_raise(email: Optional[str]) -> None:
-    """
-    Функция для минимальной проверки email на наличие символа `@`.
-    Допускается пустое значение. Считает некорректными варианты,
-    где символ `@` отсутствует или стоит первым/последним символом.
-
-    Параметры:
-        email: Email или `None`.
-    """
-    if not email:
-        return
-    email_address = email.strip()
-    if '@' not in  email_address or email_address.startswith('@') or email_address.endswith('@'):
-        raise ValueError("Ошибка. Проверьте корректность введённого email.")
-
-def validate_phone_or_raise(phone: Optional[str]) -> None:
-    """
-    Проверяет допустимость символов телефонного номера.
-    Разрешенные символы: цифры, пробел, +, (), -.
-
-    Параметры:
-        phone: Номер телефона или 'None'.
-    """
-    if phone and (not PHONE_ALLOWED.fullmatch(phone)):
+    email = data.get('email')
+    if email:
+        email = email.strip()
+        if '@' not in email or email[0] == '@' or email[-1] == '@':
+            raise ValueError("Ошибка. Проверьте корректность введённого email.")
+    phone = data.get('phone')
+    if phone and not PHONE_ALLOWED.fullmatch(phone):
         raise ValueError('Ошибка. Телефон содержит недопустимые символы.')
 
 def normalize_phone(source_phone: Optional[str]) -> str:
@@ -56,103 +100,208 @@ def normalize_phone(source_phone: Optional[str]) -> str:
     Возвращает:
         Нормализованный номер (например, '+79991234567')
     """
-    return re.sub('[^\\d+]', '', source_phone or '')
+    return _PHONE_NORM.sub('', source_phone or '')
 
 def get_connect() -> sqlite3.Connection:
     """
-    Создаёт соединение с базой данных SQLite и включает получение строк как словарей.
+    Возвращает общее соединение с базой данных SQLite (открывает его при первом вызове).
+    Строки возвращаются как 'sqlite3.Row', соединение переиспользуется между вызовами,
+    чтобы не терять кэш страниц SQLite.
 
     Возвращает:
         Объект соединения 'sqlite3.Connection'.
     """
-    connect = sqlite3.connect(DB_PATH)
-    connect.row_factory = sqlite3.Row
-    return connect
+    global _CONN
+    with _LOCK:
+        if _CONN is None:
+            connect = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=128)
+            connect.row_factory = sqlite3.Row
+            connect.execute('PRAGMA journal_mode=WAL')
+            connect.execute('PRAGMA synchronous=NORMAL')
+            connect.execute('PRAGMA temp_store=MEMORY')
+            connect.execute('PRAGMA cache_size=-20000')
+            _CONN = connect
+        return _CONN
+
+def get_read_connect() -> sqlite3.Connection:
+    """
+    Возвращает общее соединение для чтения (открывает его при первом вызове).
+    Запись через него запрещена ('PRAGMA query_only'); режим WAL базы
+    включается основным соединением из 'get_connect'.
+
+    Возвращает:
+        Объект соединения 'sqlite3.Connection'.
+    """
+    global _READ_CONN
+    get_connect()
+    with _READ_LOCK:
+        if _READ_CONN is None:
+            connect = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=128)
+            connect.row_factory = sqlite3.Row
+            connect.execute('PRAGMA query_only=ON')
+            connect.execute('PRAGMA temp_store=MEMORY')
+            connect.execute('PRAGMA cache_size=-20000')
+            _READ_CONN = connect
+        return _READ_CONN
+
+def close_db() -> None:
+    """
+    Закрывает оба общих соединения (при выходе из приложения).
+    Закрытие последнего соединения переносит журнал WAL в базу и удаляет файлы '-wal'/'-shm'.
+    """
+    global _CONN, _READ_CONN
+    with _READ_LOCK:
+        if _READ_CONN is not None:
+            _READ_CONN.close()
+            _READ_CONN = None
+    with _LOCK:
+        if _CONN is not None:
+            _CONN.close()
+            _CONN = None
 
 def init_db() -> None:
     """
-    Создаёт таблицу 'contacts' при первом запуске.
+    Открывает соединение с базой и создаёт таблицу 'contacts' при первом запуске.
     Столбец 'created_at' по умолчанию заполняется текущим временем (UTC).
+    Рядом создаются индекс по 'created_at' и полнотекстовый индекс 'contacts_fts'
+    по полям поиска, который поддерживается в актуальном состоянии триггерами.
+    Если сборка SQLite не поддерживает FTS5 с токенизатором 'trigram' (до 3.34),
+    индекс не используется и поиск идёт через LIKE.
     """
+    global _FTS_AVAILABLE
     connect = get_connect()
+    with _LOCK:
+        connect.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS contacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT,
+                phone TEXT,
+                company TEXT,
+                tags TEXT,
+                notes TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_contacts_created ON contacts(created_at DESC);
+            '''
+        )
+        # индекс без триггеров (новая база или база, открывавшаяся без FTS5) нужно перестроить
+        fts_synced = connect.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='contacts_fts_ai'").fetchone()
+        try:
+            connect.executescript(_FTS_SCHEMA_SQL)
+        except sqlite3.OperationalError:
+            # без триггеров запись в 'contacts' не зависит от модуля fts5
+            connect.executescript(_FTS_DROP_TRIGGERS_SQL)
+            _FTS_AVAILABLE = False
+            return
+        _FTS_AVAILABLE = True
+        if not fts_synced:
+            with connect:
+                connect.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+def search_folds_case(substring_search: str) -> bool:
+    """
+    Сообщает, сравнивает ли 'iter_contacts' строку поиска без учёта регистра для
+    любых букв (полнотекстовый индекс), а не только для латиницы (LIKE).
+
+    Параметры:
+        substring_search: Строка поиска (пустая — все записи, без сравнения).
+    """
+    return not substring_search or (_FTS_AVAILABLE and len(substring_search) >= _FTS_MIN_QUERY)
+
+def iter_contacts(substring_search: str='') -> Iterator[sqlite3.Row]:
+    """
+    Построчно отдаёт контакты из курсора (опционально — с фильтром по подстроке).
+    Ищет совпадения в полях: 'name', 'email', 'phone', 'company', 'tags'.
+    Чтение идёт через отдельное соединение ('get_read_connect') пачками по
+    '_FETCH_BATCH' строк; блокировка держится только на время выборки пачки,
+    поэтому незавершённый генератор не блокирует ни запись, ни другие чтения.
+
+    Параметры:
+        substring_search: Подстрока для поиска (если пусто — все записи).
+    Возвращает:
+        Итератор строк 'sqlite3.Row' (доступ по имени поля: 'id', 'name', 'email',
+        'phone', 'company', 'tags', 'notes').
+    """
+    if substring_search and search_folds_case(substring_search):
+        # строка поиска передаётся как фраза FTS5, кавычки внутри удваиваются
+        sql, params = _LIST_SQL_FTS, ('"' + substring_search.replace('"', '""') + '"',)
+    elif substring_search:
+        sql, params = _LIST_SQL_FILTER, (f'%{substring_search}%',)
+    else:
+        sql, params = _LIST_SQL_NO_FILTER, ()
+
+    connect = get_read_connect()
+    with _READ_LOCK:
+        cur = connect.execute(sql, params)
     try:
-        with connect:
-            connect.execute(
-                '''
-                CREATE TABLE IF NOT EXISTS contacts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT,
-                    phone TEXT,
-                    company TEXT,
-                    tags TEXT,
-                    notes TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );
-                '''
-            )
+        while True:
+            with _READ_LOCK:
+                batch = cur.fetchmany(_FETCH_BATCH)
+            if not batch:
+                break
+            yield from batch
     finally:
-        connect.close()
+        with _READ_LOCK:
+            cur.close()
 
-def list_contacts(substring_search: str='') -> List[Dict]:
+def list_contacts(substring_search: str='') -> List[sqlite3.Row]:
     """
-    Возвращает список контактов (опционально — с фильтром по подстроке).
-    Ищет совпадения в полях: 'name', 'email', 'phone', 'company', 'tags'.
+    Возвращает список контактов (опционально — с фильтром по подстроке),
+    см. 'iter_contacts'.
 
     Параметры:
         substring_search: Подстрока для поиска (если пусто — возвращает все записи).
     Возвращает:
-        Список словарей, каждый — одна запись контакта.
+        Список строк 'sqlite3.Row'.
     """
-    sql = 'SELECT * FROM contacts'
-    params = []
-    if substring_search:
-        sql += ' WHERE name LIKE ? OR email LIKE ? OR phone LIKE ? OR company LIKE ? OR tags LIKE ?'
-        like = f'%{substring_search}%'
-        params = [like, like, like, like, like]
-    sql += ' ORDER BY created_at DESC'
+    return list(iter_contacts(substring_search))
 
+def get_contact(contact_id: int) -> Optional[sqlite3.Row]:
+    """
+    Возвращает контакт по 'id' в том же виде, что и 'list_contacts'.
+
+    Параметры:
+        contact_id: Идентификатор контакта.
+    Возвращает:
+        Строку 'sqlite3.Row' или 'None', если записи нет.
+    """
     connect = get_connect()
-    try:
-        return [dict(row) for row in connect.execute(sql, params)]
-    finally:
-        connect.close()
+    with _LOCK:
+        return connect.execute(_GET_SQL, (contact_id,)).fetchone()
 
-def add_contact(data: Dict) -> int:
+def add_contact(data: Dict) -> sqlite3.Row:
     """
-    Добавляет контакт и возвращает его 'id'.
+    Добавляет контакт и возвращает сохранённую запись.
     Перед записью выполняется проверка имени/email/телефона, а телефон нормализуется.
     Исключение ValueError если валидация не пройдена.
 
     Параметры:
         data: Данные контакта (ключи: 'name', 'email', 'phone', 'company', 'tags', 'notes').
     Возвращает:
-        'id' вставленной записи.
+        Вставленная запись ('sqlite3.Row', поля как у 'list_contacts').
     """
-    validate_name_or_raise(data.get('name', ''))
-    validate_email_or_raise(data.get('email'))
-    validate_phone_or_raise(data.get('phone'))
+    validate_contact_or_raise(data)
     phone = normalize_phone(data.get('phone'))
 
     connect = get_connect()
-    try:
-        with connect:
-            cur = connect.execute(
-            '''
-                INSERT INTO contacts (name, email, phone, company, tags, notes) VALUES (?,?,?,?,?,?)
-                ''',
+    with _LOCK, connect:
+        cur = connect.execute(
+        '''
+            INSERT INTO contacts (name, email, phone, company, tags, notes) VALUES (?,?,?,?,?,?)
+            ''',
     (
-                data['name'],
-                data.get('email'),
-                phone,
-                data.get('company'),
-                data.get('tags'),
-                data.get('notes'),
-                )
+            data['name'],
+            data.get('email'),
+            phone,
+            data.get('company'),
+            data.get('tags'),
+            data.get('notes'),
             )
-            return int(cur.lastrowid)
-    finally:
-        connect.close()
+        )
+        return connect.execute(_GET_SQL, (cur.lastrowid,)).fetchone()
 
 
 def update_contact(contact_id: int, data: Dict) -> None:
@@ -164,30 +313,25 @@ def update_contact(contact_id: int, data: Dict) -> None:
         contact_id: Идентификатор редактируемого контакта;
         data: Новые значения полей.
     """
-    validate_name_or_raise(data.get('name', ''))
-    validate_email_or_raise(data.get('email'))
-    validate_phone_or_raise(data.get('phone'))
+    validate_contact_or_raise(data)
     phone = normalize_phone(data.get('phone'))
 
     connect = get_connect()
-    try:
-        with connect:
-            connect.execute(
-            '''
-                UPDATE contacts SET name=?, email=?, phone=?, company=?, tags=?, notes=? WHERE id=?
-                ''',
+    with _LOCK, connect:
+        connect.execute(
+        '''
+            UPDATE contacts SET name=?, email=?, phone=?, company=?, tags=?, notes=? WHERE id=?
+            ''',
     (
-                data['name'],
-                data.get('email'),
-                phone,
-                data.get('company'),
-                data.get('tags'),
-                data.get('notes'),
-                contact_id,
-              )
-            )
-    finally:
-        connect.close()
+            data['name'],
+            data.get('email'),
+            phone,
+            data.get('company'),
+            data.get('tags'),
+            data.get('notes'),
+            contact_id,
+          )
+        )
 
 def delete_contact(contact_id: int) -> None:
     """
@@ -197,11 +341,8 @@ def delete_contact(contact_id: int) -> None:
         contact_id: Идентификатор удаляемой записи.
     """
     connect = get_connect()
-    try:
-        with connect:
-            connect.execute('DELETE FROM contacts WHERE id=?', (contact_id,))
-    finally:
-        connect.close()
+    with _LOCK, connect:
+        connect.execute('DELETE FROM contacts WHERE id=?', (contact_id,))
 
 def delete_contacts(contact_ids: list[int]) -> int:
     """Удаляет сразу несколько контактов по списку id. Возвращает число удалённых строк.
@@ -211,61 +352,68 @@ def delete_contacts(contact_ids: list[int]) -> int:
     """
     if not contact_ids:
         return 0
-    # формирование плейсхолдеров (?, ?, ?, ...)
-    placeholders = ",".join(["?"] * len(contact_ids))
-    sql = f"DELETE FROM contacts WHERE id IN ({placeholders})"
+    step = _DEL_BUCKETS[-1]
+    deleted = 0
     connect = get_connect()
-    try:
-        with connect:
-            cur = connect.execute(sql, contact_ids)
-        return cur.rowcount
-    finally:
-        connect.close()
+    with _LOCK, connect:
+        for start in range(0, len(contact_ids), step):
+            chunk = list(contact_ids[start:start + step])
+            # дополняем до размера корзины, чтобы переиспользовать подготовленный запрос
+            size = next(n for n in _DEL_BUCKETS if n >= len(chunk))
+            chunk += [_DEL_PAD_ID] * (size - len(chunk))
+            deleted += connect.execute(_DEL_SQL[size], chunk).rowcount
+    return deleted
 
 def export_contacts_csv(path: str) -> int:
     """
-    Экспортирует все контакты в CSV-файл.
+    Экспортирует все контакты в CSV-файл, читая записи из БД построчно.
 
     Параметры:
         path: Путь для сохранения CSV.
     Возвращает:
         Количество экспортированных записей.
     """
-    rows = list_contacts('')
+    exported = 0
     with open(path, 'w', newline='', encoding='utf-8') as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=['name', 'email', 'phone', 'company', 'tags', 'notes'])
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({'name': row.get('name', ''), 'email': row.get('email', ''), 'phone': row.get('phone', ''),
-                             'company': row.get('company', ''), 'tags': row.get('tags', ''),
-                             'notes': row.get('notes', '')})
-    return len(rows)
+        writer = csv.writer(csv_file)
+        writer.writerow(['name', 'email', 'phone', 'company', 'tags', 'notes'])
+        # строки пишутся прямо из курсора, без промежуточного списка в памяти;
+        # поля идут в порядке 'id, name, ..., notes' — 'id' в файл не выгружается
+        for row in iter_contacts(''):
+            writer.writerow(row[1:])
+            exported += 1
+    return exported
 
 def import_contacts_csv(path: str) -> int:
     """
-    Импортирует контакты из CSV.
+    Импортирует контакты из CSV одной транзакцией.
     Ожидаемые заголовки: 'name, email, phone, company, tags, notes'.
     Пустые имена пропускаются. Телефон нормализуется.
-    Исключение ValueError если строка CSV нарушает правила валидации.
+    Исключение ValueError если строка CSV нарушает правила валидации
+    (в этом случае ни одна запись из файла не добавляется).
 
     Параметры:
         path: Путь к входному CSV-файлу.
     Возвращает:
         Количество добавленных записей.
     """
-    added = 0
+    batch: list[tuple] = []
     with open(path, 'r', newline='', encoding='utf-8') as csv_file:
         reader = csv.DictReader(csv_file)
         for row in reader:
-            data = {'name': (row.get('name') or '').strip(), 'email': (row.get('email') or '').strip(),
-                          'phone': (row.get('phone') or '').strip(), 'company': (row.get('company') or '').strip(),
-                          'tags': (row.get('tags') or '').strip(), 'notes': (row.get('notes') or '').strip()}
-            if not data['name']:
+            name = (row.get('name') or '').strip()
+            if not name:
                 continue
-            validate_name_or_raise(data['name'])
-            validate_email_or_raise(data.get('email'))
-            validate_phone_or_raise(data.get('phone'))
-            data['phone'] = normalize_phone(data.get('phone'))
-            add_contact(data)
-            added += 1
-    return added
+            email = (row.get('email') or '').strip()
+            phone = (row.get('phone') or '').strip()
+            validate_contact_or_raise({'name': name, 'email': email, 'phone': phone})
+            batch.append((name, email, normalize_phone(phone), (row.get('company') or '').strip(),
+                          (row.get('tags') or '').strip(), (row.get('notes') or '').strip()))
+
+    connect = get_connect()
+    with _LOCK, connect:
+        connect.executemany(
+            'INSERT INTO contacts (name, email, phone, company, tags, notes) VALUES (?,?,?,?,?,?)',
+            batch
+        )
+    return len(batch)
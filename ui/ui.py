@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Mapping, Optional
 import re
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 
 NAME_ALLOWED = re.compile("^[A-Za-zА-Яа-яЁё\\-' ]*$")
 PHONE_INPUT_PATTERN = re.compile('^[0-9+()\\- ]*$')
+_NON_DIGIT = re.compile('\\D')
 
 FIELD_LABELS = {
     "name": "ФИО",
@@ -16,6 +17,27 @@ FIELD_LABELS = {
     "notes": "Заметки",
 }
 
+# сколько строк таблицы добавляется за один раз (первичная отрисовка и каждая подгрузка)
+ROWS_PAGE_SIZE = 200
+# поля, по которым ищет 'db.list_contacts' (повторяется для фильтрации в памяти)
+SEARCH_FIELDS = ('name', 'email', 'phone', 'company', 'tags')
+# Tcl-процедура вставки страницы строк: один вызов из Python вместо вызова на каждую строку.
+# Уже существующие элементы не пересоздаются — им обновляются значения и место в конце списка.
+_TCL_INSERT_ROWS = '''
+proc ::crm_insert_rows {tree rows} {
+    foreach {iid values} $rows {
+        if {[$tree exists $iid]} {
+            $tree item $iid -values $values
+            $tree move $iid {} end
+        } else {
+            $tree insert {} end -id $iid -values $values
+        }
+    }
+}
+'''
+# пауза после последнего изменения строки поиска перед запуском поиска (мс)
+SEARCH_DEBOUNCE_MS = 300
+
 def format_phone(phone_number: Optional[str]) -> str:
     """
     Возвращает красиво отформатированное представление телефона для UI.
@@ -28,12 +50,25 @@ def format_phone(phone_number: Optional[str]) -> str:
     """
     if not phone_number:
         return ''
-    digits = re.sub('\\D', '', phone_number)
-    if (phone_number.startswith('+7')  or phone_number.startswith('8') or phone_number.startswith('7')
-            and len(digits) == 11):
+    digits = _NON_DIGIT.sub('', phone_number)
+    if phone_number.startswith(('+7', '8', '7')) and len(digits) == 11:
         return f'+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}'
     return phone_number
 
+def _display_row(r: Mapping) -> tuple:
+    """Преобразует запись контакта в пару (iid, значения колонок таблицы)."""
+    return str(r['id']), (r['name'], r['email'] or '', format_phone(r['phone']),
+                          r['company'] or '', r['tags'] or '', r['notes'] or '')
+
+def _cache_entry(r: Mapping) -> tuple:
+    """
+    Готовит запись к показу и поиску один раз при загрузке из БД.
+
+    Возвращает:
+        Пару (поля 'SEARCH_FIELDS' в нижнем регистре, результат '_display_row').
+    """
+    return tuple((r[f] or '').lower() for f in SEARCH_FIELDS), _display_row(r)
+
 class ContactDialog(simpledialog.Dialog):
     """
     Модальное окно создания/редактирования контакта.
@@ -132,18 +167,28 @@ class MainWindow(ttk.Frame):
                  on_del: Callable[[Optional[int]], None],
                  on_search: Callable[[str], None],
                  on_import: Callable[[], None],
-                 on_export: Callable[[], None]
+                 on_export: Callable[[], None],
+                 search_folds_case: Callable[[str], bool]
                  ) -> None:
         super().__init__(master)
+        # сообщает, ищет ли БД по строке без учёта регистра так же, как фильтр в памяти
+        self.search_folds_case = search_folds_case
         self.on_add, self.on_edit, self.on_del = (on_add, on_edit, on_del)
         self.on_search, self.on_import, self.on_export = (on_search, on_import, on_export)
         self.pack(fill='both', expand=True, padx=10, pady=10)
         top = ttk.Frame(self)
         top.pack(fill='x')
         self.q = tk.StringVar()
+        # живой поиск: серия нажатий клавиш сводится к одному запросу
+        self._pending: Optional[str] = None
+        self._last_query = ''
+        self.q.trace_add('write', self._schedule_search)
         ttk.Entry(top, textvariable=self.q).pack(side='left', fill='x', expand=True)
         ttk.Button(top, text='Поиск', command=self._search).pack(side='left', padx=5)
         ttk.Button(top, text='Сброс', command=self._reset).pack(side='left')
+        # индикатор фоновой работы с БД (показывается, пока есть незавершённые задачи)
+        self._progress = ttk.Progressbar(top, mode='indeterminate', length=80)
+        self._busy = 0
         btns = ttk.Frame(self)
         btns.pack(fill='x', pady=6)
         ttk.Button(btns, text='Добавить', command=self._add).pack(side='left')
@@ -151,24 +196,159 @@ class MainWindow(ttk.Frame):
         ttk.Button(btns, text='Удалить', command=self._del).pack(side='left')
         ttk.Button(btns, text='Экспорт CSV', command=self.on_export).pack(side='right', padx=0)
         ttk.Button(btns, text='Импорт CSV', command=self.on_import).pack(side='right')
-        self.tree = ttk.Treeview(self, columns=('name', 'email', 'phone', 'company', 'tags', 'notes'),
+        table = ttk.Frame(self)
+        table.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(table, columns=('name', 'email', 'phone', 'company', 'tags', 'notes'),
                                  show='headings', selectmode="extended")
         for col in self.tree["columns"]:
             self.tree.heading(col, text=FIELD_LABELS.get(col, col))
             self.tree.column(col, width=120, anchor="w")
-        self.tree.pack(fill='both', expand=True)
+        self.tk.eval(_TCL_INSERT_ROWS)
+        self._vsb = ttk.Scrollbar(table, orient='vertical', command=self.tree.yview)
+        # любое изменение видимой области (колесо, полоса прокрутки, ресайз) проходит через '_on_yview'
+        self.tree.configure(yscrollcommand=self._on_yview)
+        self._vsb.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        # все строки последней загрузки: (iid, значения для отображения); в таблице — первые '_shown'
+        self._all_rows: List[tuple] = []
+        self._shown = 0
+        # полный список записей (см. '_cache_entry'): пока он есть, любой поиск идёт по нему в памяти
+        self._base_rows: Optional[List[tuple]] = None
+        # записи последней загрузки из БД, строка поиска, по которой они получены,
+        # и получены ли они без учёта регистра (см. 'search_folds_case')
+        self._cache_rows: Optional[List[tuple]] = None
+        self._cache_query = ''
+        self._cache_folded = False
+        # номер последнего запроса содержимого таблицы — устаревшие фоновые загрузки отбрасываются
+        self._view_token = 0
 
-    def set_rows(self, rows: List[Dict]) -> None:
+    def set_rows(self, rows: List[Mapping], query: str='') -> None:
         """Полностью перерисовывает содержимое таблицы по списку записей.
+        В таблицу сразу попадает только первая страница строк, остальные
+        подгружаются по мере прокрутки (см. '_on_yview').
+        Записи запоминаются для последующей фильтрации в памяти.
+
+        Параметры:
+            rows: Записи контактов, как возвращает 'db.list_contacts';
+            query: Строка поиска, по которой получены записи.
+        """
+        entries = [_cache_entry(r) for r in rows]
+        if not query:
+            self._base_rows = entries
+        self._cache_rows, self._cache_query = entries, query
+        self._cache_folded = self.search_folds_case(query)
+        self._show_entries(entries)
+
+    def _show_entries(self, entries: List[tuple]) -> None:
+        """Показывает подготовленные записи (см. '_cache_entry'), не меняя кэш поиска."""
+        self._all_rows = [display for _, display in entries]
+        self._shown = 0
+        # строки, которые снова попадают на первую страницу, переиспользуются, остальные удаляются
+        keep = {iid for iid, _ in self._all_rows[:ROWS_PAGE_SIZE]}
+        stale = [iid for iid in self.tree.get_children() if iid not in keep]
+        if stale:
+            self.tree.delete(*stale)
+        self._show_more()
+        self.tree.yview_moveto(0)
+
+    def insert_row(self, row: Mapping) -> None:
+        """Добавляет новую запись в начало таблицы без перезагрузки остальных строк.
+
+        Параметры:
+            row: Запись контакта, как возвращает 'db.add_contact'.
+        """
+        entry = _cache_entry(row)
+        iid, values = entry[1]
+        self.tree.insert('', 0, iid=iid, values=values)
+        self._all_rows.insert(0, entry[1])
+        self._shown += 1
+        self._update_caches(lambda entries: [entry] + entries)
+
+    def update_row(self, row: Mapping) -> None:
+        """Обновляет значения одной записи в таблице на месте.
+
+        Параметры:
+            row: Актуальная запись контакта, как возвращает 'db.get_contact'.
+        """
+        entry = _cache_entry(row)
+        iid, values = entry[1]
+        self._all_rows = [entry[1] if i == iid else (i, v) for i, v in self._all_rows]
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=values)
+        self._update_caches(lambda entries: [entry if e[1][0] == iid else e for e in entries])
+
+    def delete_rows(self, ids: List[int]) -> None:
+        """Убирает из таблицы строки удалённых записей.
+
+        Параметры:
+            ids: Идентификаторы удалённых контактов.
+        """
+        gone = {str(i) for i in ids}
+        shown = [iid for iid in gone if self.tree.exists(iid)]
+        if shown:
+            self.tree.delete(*shown)
+        self._shown -= len(shown)
+        self._all_rows = [(i, v) for i, v in self._all_rows if i not in gone]
+        self._update_caches(lambda entries: [e for e in entries if e[1][0] not in gone])
+
+    def _update_caches(self, change: Callable[[List[tuple]], List[tuple]]) -> None:
+        """
+        Применяет изменение данных к полному списку и к записям последней загрузки
+        (один и тот же список изменяется один раз).
 
         Параметры:
-            rows: Список словарей, как возвращает 'db.list_contacts'.
+            change: Функция, возвращающая новый список записей по старому.
         """
-        self.tree.delete(*self.tree.get_children())
-        for r in rows:
-            self.tree.insert('', 'end', iid=str(r['id']), values=(r['name'], r.get('email'),
-                                                                  format_phone(r.get('phone')), r.get('company'),
-                                                                  r.get('tags'), r.get('notes')))
+        base, cache = self._base_rows, self._cache_rows
+        if base is not None:
+            self._base_rows = change(base)
+        if cache is not None:
+            self._cache_rows = self._base_rows if cache is base else change(cache)
+
+    def _show_more(self) -> None:
+        """Добавляет в таблицу следующую страницу строк из '_all_rows'."""
+        end = min(self._shown + ROWS_PAGE_SIZE, len(self._all_rows))
+        # плоский список (iid, значения, iid, значения, ...) передаётся в Tcl как список без экранирования
+        flat = tuple(item for row in self._all_rows[self._shown:end] for item in row)
+        self.tk.call('::crm_insert_rows', str(self.tree), flat)
+        self._shown = end
+
+    def _on_yview(self, first: str, last: str) -> None:
+        """Синхронизирует полосу прокрутки и подгружает строки при приближении к концу таблицы.
+
+        Параметры:
+            first, last: Границы видимой области (доли от 0 до 1), как их передаёт Treeview.
+        """
+        self._vsb.set(first, last)
+        if self._shown < len(self._all_rows) and float(last) >= 0.9:
+            self._show_more()
+
+    def request_token(self) -> int:
+        """Регистрирует новый запрос содержимого таблицы.
+
+        Возвращает:
+            Номер запроса; результаты более ранних запросов считаются устаревшими.
+        """
+        self._view_token += 1
+        return self._view_token
+
+    def is_current(self, token: int) -> bool:
+        """Проверяет, что запрос с номером 'token' — последний из выданных 'request_token'."""
+        return token == self._view_token
+
+    def begin_busy(self) -> None:
+        """Показывает индикатор фоновой работы (вызовы могут быть вложенными)."""
+        self._busy += 1
+        if self._busy == 1:
+            self._progress.pack(side='left', padx=(5, 0))
+            self._progress.start(10)
+
+    def end_busy(self) -> None:
+        """Снимает индикатор фоновой работы, когда завершена последняя задача."""
+        self._busy = max(self._busy - 1, 0)
+        if not self._busy:
+            self._progress.stop()
+            self._progress.pack_forget()
 
     def selected_id(self) -> Optional[int]:
         """Возвращает 'id' выделенной строки или 'None'."""
@@ -192,11 +372,67 @@ class MainWindow(ttk.Frame):
         """Удаляет выбранные записи, передавая их ID(ы) обработчику 'on_del'."""
         self.on_del(self.selected_ids())
 
+    def _schedule_search(self, *_args) -> None:
+        """Откладывает поиск до паузы в наборе текста, отменяя ранее запланированный."""
+        if self._pending:
+            self.after_cancel(self._pending)
+        self._pending = self.after(SEARCH_DEBOUNCE_MS, self._live_search)
+
+    def _live_search(self) -> None:
+        """Запускает отложенный поиск, если строка поиска изменилась с прошлого раза."""
+        self._pending = None
+        if self.q.get().strip() != self._last_query:
+            self._search()
+
     def _search(self) -> None:
         """Передаёт текущую строку поиска обработчику 'on_search'."""
-        self.on_search(self.q.get().strip())
+        if self._pending:
+            self.after_cancel(self._pending)
+            self._pending = None
+        q = self._last_query = self.q.get().strip()
+        source = self._narrow_source(q)
+        if source is not None:
+            # результат — подмножество уже загруженных записей; сам кэш при этом не меняется
+            self.request_token()
+            self._show_entries(self._filter_cached(source, q))
+        else:
+            self.on_search(q)
+
+    def _narrow_source(self, q: str) -> Optional[List[tuple]]:
+        """
+        Выбирает записи, фильтрацией которых в памяти можно получить результат для 'q'.
+        Это полный список, а без него — последняя загрузка, если 'q' её продолжает и она
+        получена по тем же правилам сравнения, что и фильтр в памяти (без учёта регистра).
+
+        Возвращает:
+            Список записей кэша или 'None', если нужен запрос к БД.
+        """
+        if self._base_rows is not None:
+            return self._base_rows
+        if self._cache_rows is not None and self._cache_folded and q.startswith(self._cache_query):
+            return self._cache_rows
+        return None
+
+    @staticmethod
+    def _filter_cached(entries: List[tuple], q: str) -> List[tuple]:
+        """Фильтрует записи кэша по подстроке без обращения к БД.
+
+        Параметры:
+            entries: Записи кэша (см. '_cache_entry');
+            q: Строка поиска (пустая — все записи).
+        Возвращает:
+            Записи, у которых хотя бы одно из полей 'SEARCH_FIELDS' содержит 'q' без учёта регистра.
+        """
+        if not q:
+            return entries
+        needle = q.lower()
+        return [e for e in entries if any(needle in key for key in e[0])]
+
+    def invalidate_cache(self) -> None:
+        """Сбрасывает записи, запомненные для фильтрации в памяти (после изменения данных)."""
+        self._base_rows = self._cache_rows = None
 
     def _reset(self) -> None:
         """Очищает строку поиска и сбрасывает фильтр (показывает все записи)."""
         self.q.set('')
-        self.on_search('')
+        self._search()